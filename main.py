@@ -1,6 +1,7 @@
 import os
 import json
 import time
+from collections import OrderedDict
 from datetime import datetime
 
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
@@ -8,9 +9,11 @@ from telegram.ext import (
     Updater,
     CommandHandler,
     MessageHandler,
+    TypeHandler,
     Filters,
     ConversationHandler,
     CallbackContext,
+    DispatcherHandlerStop,
 )
 
 # -------------------------
@@ -71,10 +74,66 @@ BASE_DIR = "data"
 PETS_DIR = os.path.join(BASE_DIR, "pets")
 CASES_DIR = os.path.join(BASE_DIR, "cases")
 
+SEEN_UPDATES_FILE = os.path.join(BASE_DIR, "seen_updates.json")
+
+# حداکثر تعداد update_id هایی که برای حذف تکراری‌ها به خاطر سپرده می‌شوند
+SEEN_UPDATES_LIMIT = int(os.getenv("SEEN_UPDATES_LIMIT", "1000"))
+
 os.makedirs(PETS_DIR, exist_ok=True)
 os.makedirs(CASES_DIR, exist_ok=True)
 
 
+# -------------------------
+# حذف آپدیت‌های تکراری (Idempotency)
+# -------------------------
+class SeenUpdates:
+    """
+    پنجره محدود (LRU) از update_id های پردازش‌شده که روی دیسک هم ذخیره می‌شود،
+    تا بعد از کرش یا ری‌دیپلوی، آپدیت‌هایی که تلگرام دوباره می‌فرستد
+    دوباره پردازش نشوند.
+    """
+
+    def __init__(self, path: str, limit: int):
+        self.path = path
+        self.limit = limit
+        self._ids = OrderedDict()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                ids = json.load(f)
+        except (OSError, ValueError):
+            return
+        for update_id in ids[-self.limit:]:
+            self._ids[update_id] = None
+
+    def _save(self):
+        # فرم فشرده: یک لیست JSON از شناسه‌ها به ترتیب LRU (قدیمی‌ترین اول)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(self._ids), f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def check_and_add(self, update_id: int) -> bool:
+        """
+        اگر update_id قبلاً دیده شده باشد True برمی‌گرداند؛
+        در غیر این صورت آن را ثبت و ذخیره می‌کند و False برمی‌گرداند.
+        """
+        if update_id in self._ids:
+            self._ids.move_to_end(update_id)
+            return True
+
+        self._ids[update_id] = None
+        while len(self._ids) > self.limit:
+            self._ids.popitem(last=False)
+        self._save()
+        return False
+
+
+seen_updates = SeenUpdates(SEEN_UPDATES_FILE, SEEN_UPDATES_LIMIT)
+
+
 # -------------------------
 # ذخیره پروفایل حیوان
 # -------------------------
@@ -272,6 +331,14 @@ def simple_triage(context: CallbackContext) -> dict:
     }
 
 
+# -------------------------
+# فیلتر آپدیت‌های تکراری (قبل از بقیه هندلرها اجرا می‌شود)
+# -------------------------
+def drop_duplicate_update(update: Update, context: CallbackContext):
+    if seen_updates.check_and_add(update.update_id):
+        raise DispatcherHandlerStop()
+
+
 # -------------------------
 # منوی اصلی و شروع
 # -------------------------
@@ -607,6 +674,9 @@ def main():
     updater = Updater(BOT_TOKEN, use_context=True)
     dp = updater.dispatcher
 
+    # گروه -1 قبل از همه هندلرها اجرا می‌شود و آپدیت‌های تکراری را متوقف می‌کند
+    dp.add_handler(TypeHandler(Update, drop_duplicate_update), group=-1)
+
     conv_handler = ConversationHandler(
         entry_points=[
             MessageHandler(